@@ -1,5 +1,6 @@
 import os
 import time
+from bisect import bisect_left, bisect_right
 import yfinance as yf
 import pandas as pd
 import requests
@@ -19,6 +20,11 @@ ASSETS = {
 INTERVAL = "1h"
 PERIOD = "1mo"
 SPREAD_AJAIB = 1.015 
+PAXG_KALIBRASI = 0.99048968
+
+# --- KONFIGURASI TRIGGER (ALERT ANTAR CANDLE) ---
+WATCH_MINUTES = int(os.environ.get("WATCH_MINUTES", "0"))  # 0 = tanpa mode watch
+POLL_SECONDS = 60
 
 # --- HELPER FORMATTING ---
 def fmt_idr(val): return f"Rp {val:,.0f}".replace(",", ".")
@@ -69,7 +75,7 @@ def get_data_engine(ticker_code):
 
         # 🔥 LOGIKA KALIBRASI KHUSUS 🔥
         if ticker_code == "PAXG-USD":
-            main_data = main_data * 0.99048968
+            main_data = main_data * PAXG_KALIBRASI
         
         # 2. Ambil Kurs IDR
         if isinstance(df.columns, pd.MultiIndex):
@@ -103,6 +109,73 @@ def calculate_fibonacci_levels(df):
     }
     return levels
 
+# --- VPVR POC (VOLUME TERBESAR) ---
+def calculate_poc(df):
+    price_bins = pd.cut(df['Close'], bins=50)
+    vpvr = df.groupby(price_bins, observed=True)['Volume'].sum()
+    return vpvr.idxmax().mid
+
+# --- TRIGGER INDEX (ALERT ANTAR CANDLE) ---
+# Level per aset disimpan terurut, jadi tiap update harga cukup 2x bisect
+# terhadap harga sebelumnya tanpa generate_bot_report.
+# Level diambil dari hasil generate_bot_report (indikator tidak dihitung ulang).
+def build_trigger_levels(fib_levels, poc, last_row):
+    levels = dict(fib_levels)
+    levels["VPVR POC"] = poc
+    levels["BB UPPER"] = last_row['BBU']
+    levels["BB LOWER"] = last_row['BBL']
+    # Buang level NaN (data kurang dari 20 candle buat Bollinger)
+    return {name: val for name, val in levels.items() if pd.notna(val)}
+
+# last_price diisi Close terakhir dari candle yang dipakai bikin level,
+# biar crossing tepat saat rebuild tidak hilang.
+def register_trigger_levels(index, asset_name, levels, last_price):
+    ordered = sorted(levels.items(), key=lambda item: item[1])
+    index[asset_name] = {
+        "prices": [val for _, val in ordered],
+        "names": [name for name, _ in ordered],
+        "last_price": last_price,
+    }
+
+# Aturan batas crossing (level kembar ikut semua, urut dari level terdekat):
+#   Naik : prev < level <= price
+#   Turun: price <= level < prev
+# Harga yang pas mendarat di level fire 1x (naik kalau datang dari bawah, turun
+# kalau dari atas). Selama harga diam di level itu, lalu pergi ke arah mana pun,
+# level itu tidak fire lagi (prev == level tidak lolos prev < level / level < prev).
+def check_price_update(index, asset_name, price):
+    entry = index.get(asset_name)
+    if entry is None: return []
+    # yfinance sering kasih NaN -> jangan simpan, biar crossing berikutnya tidak hilang
+    if price is None or pd.isna(price): return []
+
+    prev = entry["last_price"]
+    entry["last_price"] = price
+    if prev is None or pd.isna(prev) or price == prev: return []
+
+    prices = entry["prices"]
+    if price > prev:
+        lo, hi = bisect_right(prices, prev), bisect_right(prices, price)
+        hits = range(lo, hi)
+        direction = "⬆️ CROSS UP"
+    else:
+        lo, hi = bisect_left(prices, price), bisect_left(prices, prev)
+        hits = range(hi - 1, lo - 1, -1)
+        direction = "⬇️ CROSS DOWN"
+
+    return [(entry["names"][i], prices[i], direction) for i in hits]
+
+def format_trigger_alert(asset_name, price, kurs, crossings):
+    now = datetime.now(pytz.timezone('Asia/Jakarta'))
+    msg = f"""🚨 {asset_name} LEVEL TRIGGER
+📅 Waktu: {now.strftime('%d %b %Y | %H:%M WIB')}
+💎 PRICE USD : {fmt_usd(price)}
+💎 PRICE IDR : {fmt_idr(price * kurs)}
+------------------------------------------------------------"""
+    for name, level, direction in crossings:
+        msg += f"\n{direction} {name} @ {fmt_usd(level)}"
+    return msg
+
 def send_telegram(token, chat_id, message):
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     try:
@@ -111,17 +184,74 @@ def send_telegram(token, chat_id, message):
     except Exception as e:
         print(f"❌ Gagal Kirim: {e}")
 
+# --- HARGA TERAKHIR (1 MENIT, SEMUA ASET SEKALI DOWNLOAD) ---
+def fetch_last_prices(assets):
+    prices = {}
+    try:
+        tickers = list(assets.values())
+        df = yf.download(tickers, period="1d", interval="1m", group_by='ticker', progress=False, threads=False)
+    except Exception as e:
+        print(f"❌ Error fetching harga 1m: {e}")
+        return prices
+
+    for name, ticker in assets.items():
+        try:
+            if isinstance(df.columns, pd.MultiIndex):
+                close = df[ticker]['Close'].dropna()
+            else:
+                close = df['Close'].dropna() # Fallback
+            if close.empty: continue
+            price = close.iloc[-1]
+            if ticker == "PAXG-USD":
+                price = price * PAXG_KALIBRASI
+            prices[name] = price
+        except Exception as e:
+            print(f"❌ Error harga {name}: {e}")
+    return prices
+
+# --- REBUILD LEVEL SATU ASET (DIPAKAI SAAT CANDLE BARU CLOSE) ---
+def refresh_trigger_asset(index, kurs_map, name, ticker):
+    main_df, kurs_val = get_data_engine(ticker)
+    if main_df.empty: return
+    _, _, levels = generate_bot_report(main_df, kurs_val, name)
+    register_trigger_levels(index, name, levels, main_df['Close'].iloc[-1])
+    kurs_map[name] = kurs_val
+
+# --- MODE WATCH: POLLING HARGA, ALERT SAAT LEVEL DILEWATI ---
+def run_trigger_watch(token, chat_id, index, kurs_map, minutes):
+    deadline = time.time() + minutes * 60
+    candle_hour = datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0)
+    print(f"👁️ TRIGGER WATCH {minutes} menit ({len(index)} aset)...")
+
+    while time.time() < deadline:
+        # Candle 1h baru close -> Fibonacci, POC & BB berubah, rebuild index
+        now_hour = datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0)
+        if now_hour != candle_hour:
+            print("🔄 Candle baru, rebuild level...")
+            for name, ticker in ASSETS.items():
+                try:
+                    refresh_trigger_asset(index, kurs_map, name, ticker)
+                except Exception as e:
+                    print(f"❌ Error rebuild {name}: {e}")
+            candle_hour = now_hour
+
+        for name, price in fetch_last_prices(ASSETS).items():
+            crossings = check_price_update(index, name, price)
+            if crossings:
+                print(f"🚨 TRIGGER {name}: {len(crossings)} level")
+                send_telegram(token, chat_id, format_trigger_alert(name, price, kurs_map.get(name, 16800), crossings))
+
+        time.sleep(POLL_SECONDS)
+
 # --- ANALISA & GENERATE REPORT (FULL CLONE APP.PY) ---
 def generate_bot_report(df, kurs, asset_name):
-    if df.empty: return None, "WAIT / HOLD"
+    if df.empty: return None, "WAIT / HOLD", {}
 
     # Analisa Indikator
     df = add_manual_indicators(df)
     
     # VPVR Logic (Manual Calculation for Bot)
-    price_bins = pd.cut(df['Close'], bins=50)
-    vpvr = df.groupby(price_bins, observed=True)['Volume'].sum()
-    poc = vpvr.idxmax().mid
+    poc = calculate_poc(df)
     
     fib_levels = calculate_fibonacci_levels(df)
     last_row = df.iloc[-1]
@@ -254,7 +384,8 @@ def generate_bot_report(df, kurs, asset_name):
         elif "CRASH BOTTOM" in name: report += "\n   👉 [KIAMAT] Dasar terdalam."
         report += "\n"
 
-    return report, decision
+    trigger_levels = build_trigger_levels(fib_levels, poc, last_row)
+    return report, decision, trigger_levels
 
 # --- MAIN LOOP ---
 if __name__ == "__main__":
@@ -266,6 +397,9 @@ if __name__ == "__main__":
         print("❌ Secret Token Hilang!")
         exit()
 
+    trigger_index = {}
+    trigger_kurs = {}
+
     for name, ticker in ASSETS.items():
         try:
             print(f"🔍 Analyzing {name}...")
@@ -275,9 +409,12 @@ if __name__ == "__main__":
                 print(f"❌ Data {name} Kosong.")
                 continue
 
-            report_text, decision = generate_bot_report(main_df, kurs_val, name)
+            report_text, decision, levels = generate_bot_report(main_df, kurs_val, name)
             print(f"   👉 Result: {decision}")
 
+            register_trigger_levels(trigger_index, name, levels, main_df['Close'].iloc[-1])
+            trigger_kurs[name] = kurs_val
+
             # FILTER KIRIM TELEGRAM (DENGAN WATCHLIST)
             # if any(x in decision for x in ["BUY", "SELL", "CUT LOSS", "WATCHLIST", "FREE FALL", "SPECULATIVE"]):
             print(f"🚀 MENGIRIM ALERT {name}...")
@@ -290,3 +427,7 @@ if __name__ == "__main__":
             print(f"❌ Error pada {name}: {e}")
             
     print("✅ Selesai Scan Semua Aset.")
+
+    if WATCH_MINUTES > 0:
+        run_trigger_watch(TOKEN, CHAT_ID, trigger_index, trigger_kurs, WATCH_MINUTES)
+        print("✅ Trigger Watch Selesai.")